@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .metrics import record_cache
+from .models import CacheVersion
+
+# Collection version bumped by every write to the transcriptions table
+TRANSCRIPTIONS_CACHE = "transcriptions"
+
+
+def get_version(db: Session, name: str = TRANSCRIPTIONS_CACHE) -> Tuple[int, Optional[datetime]]:
+    """
+    Current version of a cached collection and when it last changed
+    (0 and None if never bumped)
+    """
+    row = db.query(CacheVersion.version, CacheVersion.updated_at).filter(CacheVersion.name == name).first()
+    if row is None:
+        return 0, None
+    return row.version, row.updated_at
+
+
+def bump_version(db: Session, name: str = TRANSCRIPTIONS_CACHE):
+    """
+    Increment a collection version so every worker's cache sees the change.
+
+    Runs inside the caller's transaction; commit it together with the write.
+    """
+    result = db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(name=name, version=1))
+
+
+class ResponseCache:
+    """
+    Small in-process LRU of rendered JSON bodies.
+
+    Each entry is stored with the ETag it was built for; a lookup with a
+    different ETag is a miss, so entries go stale as soon as the row or
+    collection version changes in the database, whichever worker wrote it.
+    """
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key, etag: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        hit = entry is not None and entry[0] == etag
+        record_cache(self.name, hit)
+        if not hit:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, etag: str, body: bytes):
+        self._entries[key] = (etag, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when key is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+list_cache = ResponseCache("transcriptions_list", settings.response_cache_size)
+detail_cache = ResponseCache("transcription_detail", settings.response_cache_size)
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag built from the given validator parts"""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    """Format a datetime for Last-Modified (naive values are treated as UTC)"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the current validators
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: ignore the W/ prefix on both sides
+        current = etag.removeprefix("W/")
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or current in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    """Validator headers; no-cache makes browsers revalidate on every refresh"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
@@ -0,0 +1,57 @@
+from .config import Settings, settings
+
+
+class ServiceContainer:
+    """
+    Holds the application's long-lived services and clients.
+
+    Everything is created at most once per process. With PRELOAD_SERVICES
+    enabled the lifespan handler calls preload() during startup; otherwise
+    each service is built on first access.
+    """
+
+    def __init__(self, config: Settings):
+        self.config = config
+        self._openai_client = None
+        self._transcriber = None
+        self._summarizer = None
+
+    @property
+    def openai_client(self):
+        """Shared OpenAI client (the openai package is imported here, not at module load)"""
+        if self._openai_client is None:
+            import openai
+            from .tracing import instrument_http_client
+            # DefaultHttpxClient keeps the SDK's timeouts and pool limits
+            http_client = instrument_http_client(openai.DefaultHttpxClient())
+            self._openai_client = openai.OpenAI(api_key=self.config.openai_api_key, http_client=http_client)
+        return self._openai_client
+
+    @property
+    def transcriber(self):
+        if self._transcriber is None:
+            from .services.transcriber import TranscriberService
+            self._transcriber = TranscriberService(self.config.openai_api_key, client_factory=lambda: self.openai_client)
+        return self._transcriber
+
+    @property
+    def summarizer(self):
+        if self._summarizer is None:
+            from .services.summarizer import SummarizerService
+            self._summarizer = SummarizerService(self.config.openai_api_key, client_factory=lambda: self.openai_client)
+        return self._summarizer
+
+    def preload(self):
+        """Build services and the OpenAI client now instead of on the first request"""
+        self.transcriber
+        self.summarizer
+        self.openai_client
+
+    def close(self):
+        """Release the OpenAI client's connection pool"""
+        if self._openai_client is not None:
+            self._openai_client.close()
+            self._openai_client = None
+
+
+container = ServiceContainer(settings)
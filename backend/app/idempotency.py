@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import UploadClaim
+
+
+def claim_upload(db: Session, key: str) -> Tuple[bool, Optional[int]]:
+    """
+    Claim an upload's Idempotency-Key before it is transcribed.
+
+    Returns (True, None) when this request now owns the key, otherwise
+    (False, transcription_id) with transcription_id None while the request
+    that owns it is still in flight. Claims abandoned by a dead worker can be
+    taken over once claimed_at is older than UPLOAD_CLAIM_TIMEOUT_SECONDS;
+    the owner refreshes claimed_at when Whisper returns (attach_claim), so
+    the timeout only has to outlast a single OpenAI request.
+
+    Always ends the transaction, so no pooled connection is held while the
+    caller waits on OpenAI.
+    """
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=settings.upload_claim_timeout_seconds)
+
+    claim = db.query(UploadClaim).filter(UploadClaim.key == key).first()
+    if claim is None:
+        db.add(UploadClaim(key=key, claimed_at=now))
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request with the same key claimed it first
+            db.rollback()
+            return False, None
+        return True, None
+
+    transcription_id = claim.transcription_id
+    if claim.completed_at is not None:
+        db.rollback()
+        return False, transcription_id
+
+    # In flight: only take over once the claim has timed out. When the row
+    # was already saved, the claim is closed and the retry gets that row.
+    values = {"claimed_at": now} if transcription_id is None else {"completed_at": now}
+    taken = db.execute(
+        update(UploadClaim)
+        .where(
+            UploadClaim.key == key,
+            UploadClaim.completed_at.is_(None),
+            UploadClaim.claimed_at < stale_before,
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if not taken:
+        return False, None
+    return transcription_id is None, transcription_id
+
+
+def attach_claim(db: Session, key: str, transcription_id: int):
+    """
+    Point a claim at its saved transcription and refresh claimed_at, so the
+    summary step gets a full UPLOAD_CLAIM_TIMEOUT_SECONDS of its own
+
+    Runs inside the caller's transaction so the row and the claim commit together.
+    """
+    db.execute(
+        update(UploadClaim)
+        .where(UploadClaim.key == key)
+        .values(transcription_id=transcription_id, claimed_at=datetime.now(timezone.utc))
+    )
+
+
+def release_claim(db: Session, key: str):
+    """
+    Close this request's claim: completed when its transcription was saved,
+    deleted otherwise so a retry starts over
+    """
+    db.rollback()
+    db.query(UploadClaim).filter(
+        UploadClaim.key == key, UploadClaim.transcription_id.is_(None)
+    ).delete(synchronize_session=False)
+    db.execute(
+        update(UploadClaim)
+        .where(UploadClaim.key == key, UploadClaim.transcription_id.isnot(None))
+        .values(completed_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+
+
+def forget_transcription(db: Session, transcription_id: int):
+    """
+    Drop claims pointing at a deleted transcription so the key can be reused
+
+    Runs inside the caller's transaction.
+    """
+    db.query(UploadClaim).filter(
+        UploadClaim.transcription_id == transcription_id
+    ).delete(synchronize_session=False)
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from .cache import bump_version
+from .config import settings
+from .container import container
+from .database import SessionLocal
+from .metrics import JOBS_PROCESSED, track_stage
+from .models import Job, Transcription
+
+JOB_SUMMARIZE = "summarize"
+
+
+def worker_id() -> str:
+    """Identifies the process holding a job lock (host:pid)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_job(db: Session, kind: str, transcription_id: int) -> Job:
+    """
+    Add a job unless an equivalent one is already pending or running
+
+    Runs inside the caller's transaction.
+    """
+    existing = db.query(Job).filter(
+        Job.kind == kind,
+        Job.transcription_id == transcription_id,
+        Job.status.in_(("pending", "running")),
+    ).first()
+    if existing:
+        return existing
+
+    job = Job(kind=kind, transcription_id=transcription_id, status="pending", attempts=0)
+    db.add(job)
+    return job
+
+
+def claim_job(db: Session) -> Optional[Job]:
+    """
+    Claim the oldest available job for this worker.
+
+    Uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers (processes
+    or nodes) never claim the same row. Jobs waiting out a retry backoff are
+    skipped; jobs left running by a dead worker become claimable again after
+    JOB_LOCK_TIMEOUT_SECONDS.
+    """
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=settings.job_lock_timeout_seconds)
+
+    job = (
+        db.query(Job)
+        .filter(or_(
+            and_(Job.status == "pending", or_(Job.run_after.is_(None), Job.run_after <= now)),
+            and_(Job.status == "running", Job.locked_at < stale_before),
+        ))
+        .order_by(Job.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = "running"
+    job.locked_by = worker_id()
+    job.locked_at = now
+    job.attempts += 1
+    db.commit()
+    return job
+
+
+def finish_job(db: Session, job: Job, error: Optional[str] = None):
+    """
+    Mark a job as done, or return it to the queue (failed after max attempts)
+
+    Retries back off exponentially (JOB_RETRY_BACKOFF_SECONDS, doubled per
+    attempt) so a rate-limited API doesn't burn every attempt in seconds.
+    """
+    if error is None:
+        job.status = "done"
+        job.last_error = None
+        job.run_after = None
+    else:
+        job.status = "failed" if job.attempts >= settings.job_max_attempts else "pending"
+        job.last_error = error
+        backoff = settings.job_retry_backoff_seconds * 2 ** (job.attempts - 1)
+        job.run_after = datetime.now(timezone.utc) + timedelta(seconds=backoff)
+    job.locked_by = None
+    job.locked_at = None
+    db.commit()
+
+
+def run_job(db: Session, job: Job):
+    """
+    Execute a claimed job. Jobs are idempotent: running one twice (e.g. after
+    a lock timeout) only overwrites the same result.
+
+    Blocking (database and OpenAI calls); the worker runs it in a thread.
+    """
+    if job.kind == JOB_SUMMARIZE:
+        job_id, transcription_id = job.id, job.transcription_id
+        transcription = db.query(Transcription.original_text, Transcription.created_at).filter(
+            Transcription.id == transcription_id
+        ).first()
+        # End the read transaction so no connection is held during the OpenAI call
+        db.commit()
+        if transcription is None:
+            # Deleted before the job ran; nothing to do
+            return
+
+        with track_stage("summarize", **{"transcription.id": transcription_id, "job.id": job_id}):
+            summary = container.summarizer.create_summary(
+                transcription.original_text,
+                meeting_datetime=transcription.created_at
+            )
+
+        updated = db.query(Transcription).filter(Transcription.id == transcription_id).update(
+            {"summary": summary, "version": Transcription.version + 1}, synchronize_session=False
+        )
+        if updated:
+            bump_version(db)
+        db.commit()
+    else:
+        raise ValueError(f"Tipo de job desconhecido: {job.kind}")
+
+
+class JobWorker:
+    """
+    Polls the jobs table and runs claimed jobs one at a time.
+
+    One worker runs inside each app process; throughput scales with the
+    number of processes and nodes sharing the database.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._task = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                print(f"Job worker error: {e}")
+                processed = False
+
+            if not processed:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> bool:
+        """
+        Claim and run a single job. Returns False when the queue is empty.
+        """
+        db = SessionLocal()
+        try:
+            job = await run_in_threadpool(claim_job, db)
+            if job is None:
+                return False
+
+            try:
+                await run_in_threadpool(run_job, db, job)
+            except Exception as e:
+                await run_in_threadpool(db.rollback)
+                await run_in_threadpool(finish_job, db, job, str(e))
+                JOBS_PROCESSED.labels(job.kind, job.status).inc()
+            else:
+                await run_in_threadpool(finish_job, db, job)
+                JOBS_PROCESSED.labels(job.kind, "done").inc()
+            return True
+        finally:
+            db.close()
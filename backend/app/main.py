@@ -1,20 +1,55 @@
+import time
+
+# Measured from the first import so startup time includes module loading
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import os
-from dotenv import load_dotenv
+from fastapi.responses import JSONResponse, Response
 
-from .database import create_tables
+from .config import settings
+from .container import container
+from .database import create_tables, engine
+from .jobs import JobWorker
+from .metrics import STARTUP_DURATION, PrometheusMiddleware, render_metrics
+from .tracing import setup_tracing
 from .routes import audio
 
-# Load environment variables
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables and build services before accepting requests
+    create_tables()
+    if settings.preload_services:
+        try:
+            container.preload()
+        except ValueError as e:
+            # Keep the API up (e.g. for /health) and fail on first use instead
+            print(f"Services not preloaded: {e}")
+
+    # Each process claims background jobs (e.g. async summaries) from the jobs table
+    job_worker = None
+    if settings.job_worker_enabled:
+        job_worker = JobWorker(settings.job_poll_interval)
+        job_worker.start()
+
+    startup_seconds = time.perf_counter() - _import_started
+    STARTUP_DURATION.set(startup_seconds)
+    print(f"Startup completed in {startup_seconds:.2f}s (preload_services={settings.preload_services})")
+
+    yield
+
+    if job_worker is not None:
+        await job_worker.stop()
+    container.close()
 
 # Create FastAPI application
 app = FastAPI(
     title="Audio Transcriber API",
     description="API para transcrição de áudio e geração de resumos usando OpenAI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure maximum request body size (20GB for large audio files)
@@ -22,7 +57,7 @@ app = FastAPI(
 # but we also need to ensure FastAPI doesn't have internal limits
 
 # Configure CORS
-origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
+origins = settings.allowed_origins
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,12 +65,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the dashboard read the validators used for conditional GETs
+    expose_headers=["ETag", "Last-Modified"],
 )
 
-# Create database tables on startup
-@app.on_event("startup")
-async def startup_event():
-    create_tables()
+# Record request latency per route for the /metrics endpoint
+app.add_middleware(PrometheusMiddleware)
+
+# OpenTelemetry tracing (disabled unless OTEL_TRACES_EXPORTER is set)
+setup_tracing(app, engine)
 
 # Include routers
 app.include_router(audio.router, prefix="/api")
@@ -49,16 +87,19 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "audio-transcriber-api"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
 @app.get("/api/test-openai")
 async def test_openai():
     """Test endpoint to verify OpenAI configuration"""
     try:
-        from .services.transcriber import TranscriberService
-        from .services.summarizer import SummarizerService
-        
-        # Try to initialize services
-        transcriber = TranscriberService()
-        summarizer = SummarizerService()
+        # Reuse the shared services (built on demand if not preloaded)
+        container.transcriber
+        container.summarizer
         
         return {
             "status": "success",
@@ -91,13 +132,9 @@ async def internal_error_handler(request, exc):
 if __name__ == "__main__":
     import uvicorn
     
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", "8000"))
-    debug = os.getenv("DEBUG", "True").lower() == "true"
-    
     uvicorn.run(
         "main:app",
-        host=host,
-        port=port,
-        reload=debug
+        host=settings.host,
+        port=settings.port,
+        reload=settings.debug
     )
\ No newline at end of file
@@ -0,0 +1,184 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+from .tracing import start_span
+
+# Request latency buckets go up to 10 minutes because long uploads
+# (transcription + summary) can legitimately take that long
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# OpenAI pricing (USD) used for cost estimation
+WHISPER_PRICE_PER_MINUTE = 0.006
+TOKEN_PRICES_PER_MILLION = {
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+}
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+
+STAGE_LATENCY = Histogram(
+    "audio_pipeline_stage_duration_seconds",
+    "Latency of each stage of the upload pipeline",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+AUDIO_SECONDS_PROCESSED = Counter(
+    "audio_seconds_processed_total",
+    "Seconds of audio transcribed",
+)
+
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total",
+    "OpenAI tokens consumed",
+    ["model", "direction"],
+)
+
+OPENAI_ESTIMATED_COST = Counter(
+    "openai_estimated_cost_usd_total",
+    "Estimated OpenAI spend in USD",
+    ["model"],
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)",
+    ["cache", "result"],
+)
+
+UPLOADS_IN_PROGRESS = Gauge(
+    "audio_uploads_in_progress",
+    "Uploads currently being processed (queue depth)",
+    multiprocess_mode="livesum",
+)
+
+STARTUP_DURATION = Gauge(
+    "app_startup_duration_seconds",
+    "Time from module import to ready (includes service preloading)",
+    multiprocess_mode="max",
+)
+
+JOBS_PROCESSED = Counter(
+    "jobs_processed_total",
+    "Background jobs processed by kind and outcome",
+    ["kind", "outcome"],
+)
+
+
+@contextmanager
+def track_stage(stage: str, **attributes):
+    """
+    Time a block of code and record it under the given pipeline stage.
+
+    Also opens a tracing span named after the stage; yields the span
+    (None when tracing is disabled) so callers can add attributes.
+    """
+    start = time.perf_counter()
+    try:
+        with start_span(f"audio.{stage}", **attributes) as span:
+            yield span
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+def record_transcription(model: str, duration_seconds):
+    """
+    Record audio seconds processed and the estimated Whisper cost
+    """
+    if not duration_seconds:
+        return
+    AUDIO_SECONDS_PROCESSED.inc(duration_seconds)
+    OPENAI_ESTIMATED_COST.labels(model).inc(duration_seconds / 60 * WHISPER_PRICE_PER_MINUTE)
+
+
+def record_token_usage(model: str, usage):
+    """
+    Record prompt/completion tokens and the estimated chat completion cost
+    """
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    OPENAI_TOKENS.labels(model, "input").inc(prompt_tokens)
+    OPENAI_TOKENS.labels(model, "output").inc(completion_tokens)
+
+    prices = TOKEN_PRICES_PER_MILLION.get(model)
+    if prices:
+        cost = (prompt_tokens * prices["input"] + completion_tokens * prices["output"]) / 1_000_000
+        OPENAI_ESTIMATED_COST.labels(model).inc(cost)
+
+
+def record_cache(cache: str, hit: bool):
+    """
+    Record a cache lookup result
+    """
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render_metrics():
+    """
+    Render all metrics in the Prometheus text format
+
+    Under gunicorn with PROMETHEUS_MULTIPROC_DIR set, metrics from all
+    worker processes are aggregated.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware that records request latency per route template.
+
+    Routes are labelled by their path template (e.g. /api/audio/transcriptions/{transcription_id})
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._route_paths is None:
+            fastapi_app = scope.get("app")
+            routes = getattr(fastapi_app, "routes", [])
+            self._route_paths = {
+                getattr(route, "endpoint", None): route.path
+                for route in routes
+                if hasattr(route, "path")
+            }
+        return self._route_paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(
+                scope["method"], self._route_label(scope), str(status["code"])
+            ).observe(time.perf_counter() - start)
@@ -16,6 +16,7 @@ class Transcription(Base):
     file_size = Column(Integer, nullable=True)  # Size in bytes
     language = Column(String(10), nullable=True)  # Language code (e.g., 'pt', 'en')
     tags = Column(Text, nullable=True)  # JSON array of tags
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on every change; used in the detail ETag
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -32,5 +33,60 @@ class Transcription(Base):
         """Convert tags list to JSON string"""
         self.tags = json.dumps(tags_list) if tags_list else None
     
+    def mark_changed(self):
+        """Increment the row version (in SQL, so concurrent writers can't lose a bump)"""
+        self.version = Transcription.version + 1
+    
+    def __repr__(self):
+        return f"<Transcription(id={self.id}, filename='{self.filename}')>"
+
+class Job(Base):
+    """
+    Background work item claimed by workers with SELECT ... FOR UPDATE SKIP LOCKED
+    """
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # e.g. 'summarize'
+    transcription_id = Column(Integer, nullable=True, index=True)
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_by = Column(String(255), nullable=True)  # Worker id (host:pid)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime(timezone=True), nullable=True)  # Retry backoff: not claimable before this
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}')>"
+
+class UploadClaim(Base):
+    """
+    Idempotency-Key of an upload, claimed before any work starts so a retry
+    arriving mid-upload doesn't transcribe the same file again
+    """
+    __tablename__ = "upload_claims"
+    
+    key = Column(String(255), primary_key=True)
+    transcription_id = Column(Integer, nullable=True, index=True)  # Set once the transcription row is saved
+    claimed_at = Column(DateTime(timezone=True), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)  # NULL while the upload is in flight
+    
+    def __repr__(self):
+        return f"<UploadClaim(key='{self.key}', transcription_id={self.transcription_id})>"
+
+class CacheVersion(Base):
+    """
+    Version counter per cached collection, shared by all workers and nodes.
+    Writers bump it in the same transaction as the change; caches compare
+    against it instead of relying on per-process invalidation.
+    """
+    __tablename__ = "cache_versions"
+    
+    name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
     def __repr__(self):
-        return f"<Transcription(id={self.id}, filename='{self.filename}')>"
\ No newline at end of file
+        return f"<CacheVersion(name='{self.name}', version={self.version})>"
@@ -1,14 +1,24 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 import mimetypes
 
+from ..cache import (
+    bump_version, cache_headers, detail_cache, get_version, is_not_modified, list_cache, make_etag
+)
+from ..config import settings
+from ..container import container
 from ..database import get_db
+from ..idempotency import attach_claim, claim_upload, forget_transcription, release_claim
+from ..metrics import UPLOADS_IN_PROGRESS, WHISPER_PRICE_PER_MINUTE, track_stage
+from ..tracing import set_span_attributes
+from ..jobs import JOB_SUMMARIZE, enqueue_job
 from ..models import Transcription
-from ..services.transcriber import TranscriberService
-from ..services.summarizer import SummarizerService
+from ..services.audio_probe import AudioProbe, estimate_from_size, format_from_hint, probe_audio
 
 router = APIRouter(prefix="/audio", tags=["audio"])
 
@@ -17,21 +27,12 @@ class UpdateTranscriptionRequest(BaseModel):
     filename: Optional[str] = None
     tags: Optional[List[str]] = None
 
-# Initialize services (will be initialized on first use)
-transcriber_service = None
-summarizer_service = None
-
+# Services live in the app container (built at startup when PRELOAD_SERVICES is enabled)
 def get_transcriber_service():
-    global transcriber_service
-    if transcriber_service is None:
-        transcriber_service = TranscriberService()
-    return transcriber_service
+    return container.transcriber
 
 def get_summarizer_service():
-    global summarizer_service
-    if summarizer_service is None:
-        summarizer_service = SummarizerService()
-    return summarizer_service
+    return container.summarizer
 
 # Supported audio formats
 SUPPORTED_FORMATS = {'.mp3', '.wav', '.m4a', '.ogg', '.webm', '.mp4', '.mpeg', '.mpga'}
@@ -42,15 +43,36 @@ SUPPORTED_FORMATS = {'.mp3', '.wav', '.m4a', '.ogg', '.webm', '.mp4', '.mpeg', '
 MAX_FILE_SIZE = 30 * 1024 * 1024  # 30MB limit
 OPENAI_CHUNK_LIMIT = 25 * 1024 * 1024  # 25MB - OpenAI's hard limit
 RECOMMENDED_MAX_MINUTES = 30  # Recommended maximum duration
+MAX_DURATION_MINUTES = settings.max_audio_duration_minutes  # Hard limit, checked from audio headers
+
+def _upload_response(transcription: Transcription) -> dict:
+    return {
+        "id": transcription.id,
+        "filename": transcription.filename,
+        "text": transcription.original_text,
+        "summary": transcription.summary,
+        "summary_status": "done" if transcription.summary else "pending",
+        "duration": transcription.duration,
+        "language": transcription.language,
+        "created_at": transcription.created_at
+    }
 
 @router.post("/upload")
 async def upload_audio(
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
     """
     Upload audio file, transcribe it, and generate summary
+    
+    Retries carrying the same Idempotency-Key header return the original
+    transcription instead of creating a duplicate (409 while the original
+    is still being processed). With ASYNC_SUMMARIES enabled the summary is
+    generated by a background job.
     """
+    UPLOADS_IN_PROGRESS.inc()
+    claimed = False
     try:
         # Validate file
         if not file.filename:
@@ -65,19 +87,57 @@ async def upload_audio(
             )
         
         # Check file size
-        file_content = await file.read()
+        with track_stage("read_file", **{"audio.format": file_ext}) as span:
+            file_content = await file.read()
+            set_span_attributes(span, **{"audio.file_size": len(file_content)})
         if len(file_content) > MAX_FILE_SIZE:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Arquivo muito grande. Tamanho máximo: {MAX_FILE_SIZE // (1024*1024)}MB"
             )
         
+        # Read the real duration from the container headers and reject
+        # recordings over the limit before anything is sent to OpenAI
+        with track_stage("probe", **{"audio.format": file_ext}) as span:
+            probe = probe_audio(file.file, content_type=file.content_type, filename=file.filename)
+            set_span_attributes(span, **{
+                "audio.probed_duration": probe.duration_seconds,
+                "audio.probe_source": probe.source,
+            })
+        if probe.source == "header" and probe.duration_seconds > MAX_DURATION_MINUTES * 60:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Gravação muito longa ({round(probe.duration_seconds / 60, 1)}min). Duração máxima: {MAX_DURATION_MINUTES}min"
+            )
+        
+        # Claim the key before paying for Whisper; claim_upload commits, so
+        # no connection is held during the OpenAI calls below
+        if idempotency_key:
+            claimed, existing_id = claim_upload(db, idempotency_key)
+            if not claimed:
+                if existing_id is None:
+                    raise HTTPException(
+                        status_code=409,
+                        detail="Upload com esta Idempotency-Key ainda está em processamento"
+                    )
+                existing = db.query(Transcription).filter(Transcription.id == existing_id).first()
+                if not existing:
+                    raise HTTPException(status_code=404, detail="Transcrição não encontrada")
+                if not existing.summary:
+                    await _recover_summary(db, existing)
+                return _upload_response(existing)
+        
         # Reset file pointer
         await file.seek(0)
         
         # Transcribe audio
         transcriber = get_transcriber_service()
-        transcription_result = await transcriber.transcribe_audio(file, file.filename)
+        with track_stage("transcribe", **{"audio.file_size": len(file_content)}) as span:
+            transcription_result = await transcriber.transcribe_audio(file, file.filename)
+            set_span_attributes(span, **{
+                "audio.duration": transcription_result.get("duration"),
+                "audio.language": transcription_result.get("language"),
+            })
         
         # Save to database first to get created_at timestamp
         db_transcription = Transcription(
@@ -89,50 +149,123 @@ async def upload_audio(
             language=transcription_result.get("language")
         )
         
-        db.add(db_transcription)
-        db.commit()
-        db.refresh(db_transcription)
-        
-        # Generate summary with meeting timestamp
+        with track_stage("db_insert"):
+            db.add(db_transcription)
+            db.flush()
+            if idempotency_key:
+                attach_claim(db, idempotency_key, db_transcription.id)
+            if settings.async_summaries:
+                enqueue_job(db, JOB_SUMMARIZE, db_transcription.id)
+            bump_version(db)
+            db.commit()
+            db.refresh(db_transcription)
+        
+        # Summary is produced by whichever worker claims the job
+        if settings.async_summaries:
+            return _upload_response(db_transcription)
+        
+        # Generate summary with meeting timestamp; read what's needed before
+        # ending the transaction (touching an expired attribute reopens it)
+        transcription_id, meeting_datetime = db_transcription.id, db_transcription.created_at
+        _end_transaction(db)
         summarizer = get_summarizer_service()
-        summary = await summarizer.generate_summary(
-            transcription_result["text"],
-            meeting_datetime=db_transcription.created_at
-        )
+        with track_stage("summarize", **{"transcription.id": transcription_id}):
+            summary = await summarizer.generate_summary(
+                transcription_result["text"],
+                meeting_datetime=meeting_datetime
+            )
         
         # Update with generated summary
-        db_transcription.summary = summary
-        db.commit()
-        db.refresh(db_transcription)
+        with track_stage("db_update"):
+            db_transcription.summary = summary
+            db_transcription.mark_changed()
+            bump_version(db)
+            db.commit()
+            db.refresh(db_transcription)
         
-        return {
-            "id": db_transcription.id,
-            "filename": db_transcription.filename,
-            "text": db_transcription.original_text,
-            "summary": db_transcription.summary,
-            "duration": db_transcription.duration,
-            "language": db_transcription.language,
-            "created_at": db_transcription.created_at
-        }
+        return _upload_response(db_transcription)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
+    finally:
+        if claimed:
+            release_claim(db, idempotency_key)
+        UPLOADS_IN_PROGRESS.dec()
+
+def _end_transaction(db: Session):
+    """
+    Return the session's connection to the pool before a slow OpenAI call
+
+    Commit expires loaded objects, so copy any attribute needed during the
+    call beforehand.
+    """
+    db.commit()
+
+async def _recover_summary(db: Session, transcription: Transcription):
+    """
+    Finish the summary of an upload whose original request failed after the
+    transcription was saved, so the retry doesn't replay an empty summary
+    """
+    if settings.async_summaries:
+        enqueue_job(db, JOB_SUMMARIZE, transcription.id)
+        db.commit()
+        return
+    
+    transcription_id = transcription.id
+    original_text, meeting_datetime = transcription.original_text, transcription.created_at
+    _end_transaction(db)
+    summarizer = get_summarizer_service()
+    with track_stage("summarize", **{"transcription.id": transcription_id}):
+        summary = await summarizer.generate_summary(original_text, meeting_datetime=meeting_datetime)
+    
+    transcription.summary = summary
+    transcription.mark_changed()
+    bump_version(db)
+    db.commit()
+    db.refresh(transcription)
+    _invalidate_caches(transcription_id)
+
+def _cached_json(body: bytes, headers: dict) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _render_json(content: dict) -> bytes:
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+def _invalidate_caches(transcription_id: int):
+    """Drop this process's cached responses; other workers notice the version bump"""
+    list_cache.invalidate()
+    detail_cache.invalidate(transcription_id)
 
 @router.get("/transcriptions")
 async def get_transcriptions(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
     """
     Get list of all transcriptions
+    
+    Supports conditional GET: the ETag is derived from the collection
+    version, so an unchanged list costs one tiny query and a 304.
     """
     try:
+        version, version_updated_at = get_version(db)
+        etag = make_etag("list", version, skip, limit)
+        headers = cache_headers(etag, version_updated_at)
+        
+        if is_not_modified(request, etag, version_updated_at):
+            return Response(status_code=304, headers=headers)
+        
+        body = list_cache.get((skip, limit), etag)
+        if body is not None:
+            return _cached_json(body, headers)
+        
         transcriptions = db.query(Transcription).offset(skip).limit(limit).all()
         
-        return {
+        body = _render_json({
             "transcriptions": [
                 {
                     "id": t.id,
@@ -149,7 +282,9 @@ async def get_transcriptions(
                 for t in transcriptions
             ],
             "total": len(transcriptions)
-        }
+        })
+        list_cache.set((skip, limit), etag, body)
+        return _cached_json(body, headers)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar transcrições: {str(e)}")
@@ -157,18 +292,41 @@ async def get_transcriptions(
 @router.get("/transcriptions/{transcription_id}")
 async def get_transcription(
     transcription_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Get specific transcription by ID
+    
+    Supports conditional GET: the ETag comes from the row version (exact
+    even for writes within the same second), Last-Modified from updated_at.
     """
     try:
+        # Only the validators are needed to answer 304 or serve from cache
+        validators = db.query(
+            Transcription.version, Transcription.updated_at, Transcription.created_at
+        ).filter(Transcription.id == transcription_id).first()
+        
+        if not validators:
+            raise HTTPException(status_code=404, detail="Transcrição não encontrada")
+        
+        last_modified = validators.updated_at or validators.created_at
+        etag = make_etag("t", transcription_id, validators.version)
+        headers = cache_headers(etag, last_modified)
+        
+        if is_not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+        
+        body = detail_cache.get(transcription_id, etag)
+        if body is not None:
+            return _cached_json(body, headers)
+        
         transcription = db.query(Transcription).filter(Transcription.id == transcription_id).first()
         
         if not transcription:
             raise HTTPException(status_code=404, detail="Transcrição não encontrada")
         
-        return {
+        body = _render_json({
             "id": transcription.id,
             "filename": transcription.filename,
             "text": transcription.original_text,
@@ -179,7 +337,9 @@ async def get_transcription(
             "tags": transcription.get_tags(),
             "created_at": transcription.created_at,
             "updated_at": transcription.updated_at
-        }
+        })
+        detail_cache.set(transcription_id, etag, body)
+        return _cached_json(body, headers)
         
     except HTTPException:
         raise
@@ -209,8 +369,11 @@ async def update_transcription(
         if update_data.tags is not None:
             transcription.set_tags(update_data.tags)
         
+        transcription.mark_changed()
+        bump_version(db)
         db.commit()
         db.refresh(transcription)
+        _invalidate_caches(transcription_id)
         
         return {
             "id": transcription.id,
@@ -245,7 +408,10 @@ async def delete_transcription(
             raise HTTPException(status_code=404, detail="Transcrição não encontrada")
         
         db.delete(transcription)
+        forget_transcription(db, transcription_id)
+        bump_version(db)
         db.commit()
+        _invalidate_caches(transcription_id)
         
         return {"message": "Transcrição deletada com sucesso"}
         
@@ -269,16 +435,22 @@ async def regenerate_summary(
             raise HTTPException(status_code=404, detail="Transcrição não encontrada")
         
         # Generate new summary with original meeting timestamp
+        original_text, meeting_datetime = transcription.original_text, transcription.created_at
+        _end_transaction(db)
         summarizer = get_summarizer_service()
-        new_summary = await summarizer.generate_summary(
-            transcription.original_text,
-            meeting_datetime=transcription.created_at
-        )
+        with track_stage("summarize", **{"transcription.id": transcription_id}):
+            new_summary = await summarizer.generate_summary(
+                original_text,
+                meeting_datetime=meeting_datetime
+            )
         
         # Update database
         transcription.summary = new_summary
+        transcription.mark_changed()
+        bump_version(db)
         db.commit()
         db.refresh(transcription)
+        _invalidate_caches(transcription_id)
         
         return {
             "id": transcription.id,
@@ -295,56 +467,86 @@ async def regenerate_summary(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao regenerar resumo: {str(e)}")
 
+def _build_cost_estimate(probe: AudioProbe) -> dict:
+    """
+    Build the cost estimate response (with warnings) from a probe result
+    """
+    # OpenAI Whisper pricing: $0.006 per minute
+    PRICE_PER_MINUTE = WHISPER_PRICE_PER_MINUTE
+    
+    file_size_mb = probe.size / (1024 * 1024)
+    estimated_minutes = probe.duration_seconds / 60
+    estimated_cost = estimated_minutes * PRICE_PER_MINUTE
+    
+    # Check limits and generate warnings
+    warnings = []
+    exceeds_limit = False
+    
+    if file_size_mb > MAX_FILE_SIZE / (1024 * 1024):
+        exceeds_limit = True
+        warnings.append(f"⚠️ Arquivo excede o limite de {MAX_FILE_SIZE // (1024*1024)}MB")
+    elif probe.source == "header" and estimated_minutes > MAX_DURATION_MINUTES:
+        exceeds_limit = True
+        warnings.append(f"⚠️ Duração ({round(estimated_minutes, 1)}min) excede o limite de {MAX_DURATION_MINUTES}min")
+    elif file_size_mb > 25:
+        warnings.append(f"⚠️ Arquivo próximo do limite da API OpenAI (25MB). Pode falhar.")
+    elif estimated_minutes > RECOMMENDED_MAX_MINUTES:
+        warnings.append(f"⚠️ Duração estimada ({round(estimated_minutes, 1)}min) excede o recomendado ({RECOMMENDED_MAX_MINUTES}min)")
+    elif estimated_minutes > 25:
+        warnings.append(f"ℹ️ Arquivo grande ({round(estimated_minutes, 1)}min). Transcrição pode demorar.")
+    
+    if probe.source == "header":
+        note = "Duração lida do cabeçalho do arquivo."
+    else:
+        note = f"Estimativa baseada em taxa típica de {probe.bitrate_kbps} kbps. O custo real pode variar."
+    
+    return {
+        "file_size_mb": round(file_size_mb, 2),
+        "format": probe.format,
+        "duration_source": probe.source,
+        "bitrate_kbps": round(probe.bitrate_kbps, 1) if probe.bitrate_kbps else None,
+        "estimated_duration_minutes": round(estimated_minutes, 1),
+        "estimated_cost_usd": round(estimated_cost, 4),
+        "estimated_cost_brl": round(estimated_cost * 5.0, 2),  # Approximate BRL conversion
+        "price_per_minute_usd": PRICE_PER_MINUTE,
+        "max_allowed_minutes": RECOMMENDED_MAX_MINUTES,
+        "max_duration_minutes": MAX_DURATION_MINUTES,
+        "max_allowed_mb": MAX_FILE_SIZE // (1024 * 1024),
+        "exceeds_limit": exceeds_limit,
+        "warnings": warnings,
+        "note": note
+    }
+
 @router.get("/estimate-cost")
-async def estimate_transcription_cost(file_size_mb: float):
+async def estimate_transcription_cost(file_size_mb: float, content_type: Optional[str] = None):
     """
-    Estimate the cost of transcribing an audio file
+    Estimate the cost of transcribing an audio file from its size
     
     Args:
         file_size_mb: Size of the audio file in MB
+        content_type: Optional content type hint (e.g. audio/webm) used to pick a typical bitrate
     
     Returns:
         Estimated cost and duration based on OpenAI Whisper pricing with warnings
     """
     try:
-        # OpenAI Whisper pricing: $0.006 per minute
-        PRICE_PER_MINUTE = 0.006
-        
-        # Estimate duration based on file size
-        # Average bitrate for webm audio: ~128 kbps = ~0.96 MB/minute
-        # But can vary from 0.5 MB/min (low quality) to 2 MB/min (high quality)
-        # We'll use conservative estimate: 1 MB/minute
-        ESTIMATED_MB_PER_MINUTE = 1.0
-        
-        estimated_minutes = file_size_mb / ESTIMATED_MB_PER_MINUTE
-        estimated_cost = estimated_minutes * PRICE_PER_MINUTE
-        
-        # Check limits and generate warnings
-        warnings = []
-        exceeds_limit = False
-        
-        if file_size_mb > MAX_FILE_SIZE / (1024 * 1024):
-            exceeds_limit = True
-            warnings.append(f"⚠️ Arquivo excede o limite de {MAX_FILE_SIZE // (1024*1024)}MB")
-        elif file_size_mb > 25:
-            warnings.append(f"⚠️ Arquivo próximo do limite da API OpenAI (25MB). Pode falhar.")
-        elif estimated_minutes > RECOMMENDED_MAX_MINUTES:
-            warnings.append(f"⚠️ Duração estimada ({round(estimated_minutes, 1)}min) excede o recomendado ({RECOMMENDED_MAX_MINUTES}min)")
-        elif estimated_minutes > 25:
-            warnings.append(f"ℹ️ Arquivo grande ({round(estimated_minutes, 1)}min). Transcrição pode demorar.")
+        probe = estimate_from_size(int(file_size_mb * 1024 * 1024), format_from_hint(content_type))
+        return _build_cost_estimate(probe)
         
-        return {
-            "file_size_mb": file_size_mb,
-            "estimated_duration_minutes": round(estimated_minutes, 1),
-            "estimated_cost_usd": round(estimated_cost, 4),
-            "estimated_cost_brl": round(estimated_cost * 5.0, 2),  # Approximate BRL conversion
-            "price_per_minute_usd": PRICE_PER_MINUTE,
-            "max_allowed_minutes": RECOMMENDED_MAX_MINUTES,
-            "max_allowed_mb": MAX_FILE_SIZE // (1024 * 1024),
-            "exceeds_limit": exceeds_limit,
-            "warnings": warnings,
-            "note": "Estimativa baseada em taxa média de 1 MB/minuto. O custo real pode variar."
-        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular estimativa: {str(e)}")
+
+@router.post("/estimate-cost")
+async def estimate_transcription_cost_from_file(file: UploadFile = File(...)):
+    """
+    Estimate the cost of transcribing an uploaded audio file
+    
+    Reads the real duration from the container headers (only the first and
+    last few KB of the file are parsed).
+    """
+    try:
+        probe = probe_audio(file.file, content_type=file.content_type, filename=file.filename)
+        return _build_cost_estimate(probe)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao calcular estimativa: {str(e)}")
@@ -0,0 +1,430 @@
+"""
+Read duration and bitrate from audio container headers.
+
+Only the first and last few KB of the file are read (plus a handful of
+box headers for MP4), so probing a 30MB upload costs a few small reads.
+Supported containers: WAV, MP3, OGG (Vorbis/Opus), MP4/M4A and WebM/Matroska.
+"""
+import os
+import struct
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 64 * 1024
+# WebM files from MediaRecorder have no Duration element, so the last cluster
+# has to be found in the tail; retry once with a wider window if needed
+MAX_TAIL_BYTES = 1024 * 1024
+
+# Typical bitrates (kbps) used when only a size and content-type hint is available
+TYPICAL_BITRATES_KBPS = {
+    "webm": 96,   # MediaRecorder Opus at its default (stereo) bitrate
+    "ogg": 96,
+    "mp3": 128,
+    "mp4": 128,
+    "wav": 256,   # 16 kHz mono 16-bit PCM
+}
+DEFAULT_BITRATE_KBPS = 128
+
+CONTENT_TYPE_FORMATS = {
+    "audio/webm": "webm",
+    "video/webm": "webm",
+    "audio/ogg": "ogg",
+    "audio/opus": "ogg",
+    "audio/mpeg": "mp3",
+    "audio/mp3": "mp3",
+    "audio/mpga": "mp3",
+    "audio/mp4": "mp4",
+    "audio/m4a": "mp4",
+    "audio/x-m4a": "mp4",
+    "video/mp4": "mp4",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/wave": "wav",
+}
+
+EXTENSION_FORMATS = {
+    ".webm": "webm",
+    ".ogg": "ogg",
+    ".mp3": "mp3",
+    ".mpeg": "mp3",
+    ".mpga": "mp3",
+    ".mp4": "mp4",
+    ".m4a": "mp4",
+    ".wav": "wav",
+}
+
+
+@dataclass
+class AudioProbe:
+    format: Optional[str]
+    size: int
+    duration_seconds: Optional[float]
+    bitrate_kbps: Optional[float]
+    # "header" when read from the container, "estimate" when derived from size
+    source: str
+
+
+def format_from_hint(content_type: Optional[str] = None, filename: Optional[str] = None) -> Optional[str]:
+    """
+    Guess the container format from a content type or filename
+    """
+    if content_type:
+        fmt = CONTENT_TYPE_FORMATS.get(content_type.split(";")[0].strip().lower())
+        if fmt:
+            return fmt
+    if filename:
+        return EXTENSION_FORMATS.get(os.path.splitext(filename.lower())[1])
+    return None
+
+
+def estimate_from_size(size: int, fmt: Optional[str] = None) -> AudioProbe:
+    """
+    Estimate duration from file size and the typical bitrate of the format
+    """
+    bitrate = TYPICAL_BITRATES_KBPS.get(fmt, DEFAULT_BITRATE_KBPS)
+    return AudioProbe(
+        format=fmt,
+        size=size,
+        duration_seconds=size * 8 / (bitrate * 1000),
+        bitrate_kbps=bitrate,
+        source="estimate",
+    )
+
+
+def probe_audio(fileobj, content_type: Optional[str] = None, filename: Optional[str] = None) -> AudioProbe:
+    """
+    Probe a seekable binary file object for duration and bitrate
+
+    Falls back to a size-based estimate when the headers can't be parsed.
+    The file position is restored afterwards.
+
+    Args:
+        fileobj: Seekable binary file object
+        content_type: Optional content type hint
+        filename: Optional filename hint
+
+    Returns:
+        AudioProbe: Detected format, duration and bitrate
+    """
+    position = fileobj.tell()
+    try:
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+
+        def read_at(offset: int, length: int) -> bytes:
+            fileobj.seek(max(0, offset))
+            return fileobj.read(length)
+
+        head = read_at(0, HEAD_BYTES)
+        fmt = _detect_format(head) or format_from_hint(content_type, filename)
+
+        parser = PARSERS.get(fmt)
+        result = None
+        if parser:
+            try:
+                result = parser(head, read_at, size)
+            except (struct.error, ValueError, IndexError):
+                result = None
+
+        if result and result[0]:
+            duration, bitrate = result
+            if not bitrate:
+                bitrate = size * 8 / duration / 1000
+            return AudioProbe(format=fmt, size=size, duration_seconds=duration, bitrate_kbps=bitrate, source="header")
+
+        return estimate_from_size(size, fmt)
+    finally:
+        fileobj.seek(position)
+
+
+def _detect_format(head: bytes) -> Optional[str]:
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+# --- WAV ---------------------------------------------------------------------
+
+def _parse_wav(head: bytes, read_at: Callable, size: int):
+    offset = 12
+    byte_rate = None
+    while offset + 8 <= len(head):
+        chunk_id = head[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", head, offset + 4)[0]
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack_from("<I", head, offset + 16)[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streaming writers leave the size as 0 or 0xFFFFFFFF
+            data_size = chunk_size
+            if data_size in (0, 0xFFFFFFFF) or offset + 8 + data_size > size:
+                data_size = size - offset - 8
+            return data_size / byte_rate, byte_rate * 8 / 1000
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+# --- MP3 ---------------------------------------------------------------------
+
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+def _parse_mp3(head: bytes, read_at: Callable, size: int):
+    audio_start = 0
+    if head[:3] == b"ID3":
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        audio_start = 10 + tag_size
+        if audio_start + 4 > len(head):
+            # Large ID3 tag (e.g. cover art): read the first frames after it
+            head = read_at(audio_start, 4096)
+            frame_offset = 0
+        else:
+            frame_offset = audio_start
+    else:
+        frame_offset = 0
+
+    # Find the first valid Layer III frame header
+    while frame_offset + 4 <= len(head):
+        if head[frame_offset] == 0xFF and head[frame_offset + 1] & 0xE0 == 0xE0:
+            header = struct.unpack_from(">I", head, frame_offset)[0]
+            version_bits = (header >> 19) & 0x3
+            layer_bits = (header >> 17) & 0x3
+            bitrate_index = (header >> 12) & 0xF
+            rate_index = (header >> 10) & 0x3
+            if version_bits != 1 and layer_bits == 1 and 0 < bitrate_index < 15 and rate_index < 3:
+                break
+        frame_offset += 1
+    else:
+        return None
+
+    mpeg1 = version_bits == 3
+    sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+    bitrate_kbps = MP3_BITRATES[1 if mpeg1 else 2][bitrate_index]
+    samples_per_frame = 1152 if mpeg1 else 576
+    mono = ((header >> 6) & 0x3) == 3
+
+    # VBR files carry the total frame count in a Xing/Info or VBRI header
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = frame_offset + 4 + side_info
+    if head[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", head, xing + 4)[0]
+        if flags & 0x1:
+            frames = struct.unpack_from(">I", head, xing + 8)[0]
+            duration = frames * samples_per_frame / sample_rate
+            return duration, None
+    vbri = frame_offset + 4 + 32
+    if head[vbri:vbri + 4] == b"VBRI":
+        frames = struct.unpack_from(">I", head, vbri + 14)[0]
+        return frames * samples_per_frame / sample_rate, None
+
+    # Constant bitrate: duration follows from the audio payload size
+    audio_size = size - audio_start
+    if read_at(size - 128, 3) == b"TAG":
+        audio_size -= 128
+    return audio_size * 8 / (bitrate_kbps * 1000), bitrate_kbps
+
+
+# --- OGG ---------------------------------------------------------------------
+
+def _parse_ogg(head: bytes, read_at: Callable, size: int):
+    # First page holds the codec identification packet
+    segments = head[26]
+    packet = head[27 + segments:27 + segments + 64]
+    if packet.startswith(b"OpusHead"):
+        # Opus granule positions are always at 48 kHz
+        sample_rate = 48000
+        pre_skip = struct.unpack_from("<H", packet, 10)[0]
+    elif packet.startswith(b"\x01vorbis"):
+        sample_rate = struct.unpack_from("<I", packet, 12)[0]
+        pre_skip = 0
+    else:
+        return None
+
+    tail = read_at(size - TAIL_BYTES, TAIL_BYTES)
+    page = tail.rfind(b"OggS")
+    if page < 0 or page + 14 > len(tail):
+        return None
+    granule = struct.unpack_from("<q", tail, page + 6)[0]
+    if granule <= 0:
+        return None
+    return (granule - pre_skip) / sample_rate, None
+
+
+# --- MP4 ---------------------------------------------------------------------
+
+def _parse_mp4(head: bytes, read_at: Callable, size: int):
+    # Walk top-level boxes reading only their headers until moov is found
+    offset = 0
+    while offset + 8 <= size:
+        header = read_at(offset, 16)
+        box_size, box_type = struct.unpack_from(">I4s", header, 0)
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = size - offset
+        if box_size < header_size:
+            return None
+
+        if box_type == b"moov":
+            moov = read_at(offset + header_size, min(box_size - header_size, HEAD_BYTES))
+            mvhd = moov.find(b"mvhd")
+            if mvhd < 4:
+                return None
+            version = moov[mvhd + 4]
+            if version == 1:
+                timescale, duration = struct.unpack_from(">IQ", moov, mvhd + 4 + 4 + 16)
+            else:
+                timescale, duration = struct.unpack_from(">II", moov, mvhd + 4 + 4 + 8)
+            if not timescale:
+                return None
+            return duration / timescale, None
+
+        offset += box_size
+    return None
+
+
+# --- WebM / Matroska ---------------------------------------------------------
+
+EBML_SEGMENT = 0x18538067
+EBML_INFO = 0x1549A966
+EBML_TIMECODE_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_CLUSTER = 0x1F43B675
+EBML_CLUSTER_TIMECODE = 0xE7
+EBML_SIMPLE_BLOCK = 0xA3
+EBML_BLOCK_GROUP = 0xA0
+EBML_BLOCK = 0xA1
+# Elements whose children we descend into while scanning
+EBML_MASTERS = {EBML_SEGMENT, EBML_INFO, EBML_CLUSTER, EBML_BLOCK_GROUP}
+UNKNOWN_SIZE = -1
+
+
+def _read_vint(data: bytes, offset: int, keep_marker: bool):
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer")
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = value == mask - 1
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    if offset + length > len(data):
+        raise IndexError("Truncated EBML element")
+    if not keep_marker and all_ones:
+        value = UNKNOWN_SIZE
+    return value, length
+
+
+def _iter_ebml(data: bytes, offset: int, end: int):
+    """Yield (id, data_offset, data_size) for elements between offset and end"""
+    while offset < end:
+        element_id, id_length = _read_vint(data, offset, keep_marker=True)
+        size, size_length = _read_vint(data, offset + id_length, keep_marker=False)
+        data_offset = offset + id_length + size_length
+        yield element_id, data_offset, size
+        if size == UNKNOWN_SIZE or element_id in EBML_MASTERS:
+            offset = data_offset
+        else:
+            offset = data_offset + size
+
+
+def _parse_webm(head: bytes, read_at: Callable, size: int):
+    timecode_scale = 1000000
+    duration = None
+    try:
+        for element_id, data_offset, element_size in _iter_ebml(head, 0, len(head)):
+            if element_id == EBML_TIMECODE_SCALE:
+                timecode_scale = int.from_bytes(head[data_offset:data_offset + element_size], "big")
+            elif element_id == EBML_DURATION:
+                fmt = ">f" if element_size == 4 else ">d"
+                duration = struct.unpack_from(fmt, head, data_offset)[0]
+            elif element_id == EBML_CLUSTER:
+                break
+    except (IndexError, ValueError, struct.error):
+        pass
+
+    if duration:
+        return duration * timecode_scale / 1e9, None
+
+    # No Duration element (MediaRecorder output): use the last cluster's timecode
+    tail_bytes = TAIL_BYTES
+    while True:
+        tail_start = max(0, size - tail_bytes)
+        tail = read_at(tail_start, tail_bytes)
+        last_timecode = _last_block_timecode(tail)
+        if last_timecode is not None or tail_bytes >= MAX_TAIL_BYTES or tail_start == 0:
+            break
+        tail_bytes = MAX_TAIL_BYTES
+    if last_timecode is None:
+        return None
+    return last_timecode * timecode_scale / 1e9, None
+
+
+def _last_block_timecode(tail: bytes) -> Optional[int]:
+    """Absolute timecode of the last block in the last complete cluster header found in tail"""
+    marker = EBML_CLUSTER.to_bytes(4, "big")
+    position = tail.rfind(marker)
+    while position >= 0:
+        try:
+            return _cluster_end_timecode(tail, position)
+        except (IndexError, ValueError, struct.error):
+            # False positive inside block payload; keep searching backwards
+            position = tail.rfind(marker, 0, position)
+    return None
+
+
+def _cluster_end_timecode(data: bytes, position: int) -> int:
+    _, size_length = _read_vint(data, position + 4, keep_marker=False)
+    offset = position + 4 + size_length
+    cluster_timecode = None
+    last_relative = 0
+    try:
+        for element_id, data_offset, element_size in _iter_ebml(data, offset, len(data)):
+            if element_id == EBML_CLUSTER:
+                break
+            if element_id == EBML_CLUSTER_TIMECODE:
+                cluster_timecode = int.from_bytes(data[data_offset:data_offset + element_size], "big")
+            elif element_id in (EBML_SIMPLE_BLOCK, EBML_BLOCK) and cluster_timecode is not None:
+                _, track_length = _read_vint(data, data_offset, keep_marker=False)
+                relative = struct.unpack_from(">h", data, data_offset + track_length)[0]
+                last_relative = max(last_relative, relative)
+    except (IndexError, ValueError, struct.error):
+        # Tail of the file may end mid-element; keep what was parsed
+        pass
+    if cluster_timecode is None:
+        raise ValueError("Cluster without timecode")
+    return cluster_timecode + last_relative
+
+
+PARSERS = {
+    "wav": _parse_wav,
+    "mp3": _parse_mp3,
+    "ogg": _parse_ogg,
+    "mp4": _parse_mp4,
+    "webm": _parse_webm,
+}
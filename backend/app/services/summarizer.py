@@ -1,28 +1,50 @@
-import os
-import openai
-from dotenv import load_dotenv
+from typing import Callable, Optional
 
-load_dotenv()
+import pytz
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..metrics import record_token_usage, track_stage
+from ..tracing import set_span_attributes
+
+BRAZIL_TZ = pytz.timezone('America/Sao_Paulo')
 
 class SummarizerService:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
+    def __init__(self, api_key: Optional[str] = None, client_factory: Optional[Callable] = None):
+        api_key = api_key if api_key is not None else settings.openai_api_key
         if not api_key or api_key == "your_openai_api_key_here":
             raise ValueError("OPENAI_API_KEY environment variable is required and must be set to a valid OpenAI API key")
         
-        # Simple client initialization
+        # Client is created on first use (or shared through client_factory)
         self.api_key = api_key
         self.client = None
+        self._client_factory = client_factory
         print(f"SummarizerService initialized with API key ending in: ...{api_key[-4:]}")
     
     def _get_client(self):
-        """Get OpenAI client"""
-        return openai.OpenAI(api_key=self.api_key)
+        """Get OpenAI client (created once and reused)"""
+        if self.client is None:
+            if self._client_factory is not None:
+                self.client = self._client_factory()
+            else:
+                import openai
+                self.client = openai.OpenAI(api_key=self.api_key)
+        return self.client
     
     async def generate_summary(self, text: str, meeting_datetime=None, max_length: int = 200) -> str:
         """
         Generate meeting minutes using OpenAI GPT-4o-mini
         
+        Runs create_summary() in the threadpool so the request handlers don't
+        block the event loop while waiting on OpenAI.
+        """
+        return await run_in_threadpool(self.create_summary, text, meeting_datetime, max_length)
+    
+    def create_summary(self, text: str, meeting_datetime=None, max_length: int = 200) -> str:
+        """
+        Generate meeting minutes using OpenAI GPT-4o-mini (blocking call,
+        meant for worker threads)
+        
         Args:
             text: Original transcribed text
             meeting_datetime: DateTime object of when the meeting was recorded
@@ -36,15 +58,11 @@ class SummarizerService:
                 return "Texto muito curto para gerar ata de reunião."
             
             # Format meeting datetime if provided
-            from datetime import datetime
-            import pytz
-            
             if meeting_datetime:
                 # Convert to Brazil timezone
-                brazil_tz = pytz.timezone('America/Sao_Paulo')
                 if meeting_datetime.tzinfo is None:
                     meeting_datetime = pytz.utc.localize(meeting_datetime)
-                meeting_datetime_br = meeting_datetime.astimezone(brazil_tz)
+                meeting_datetime_br = meeting_datetime.astimezone(BRAZIL_TZ)
                 
                 date_str = meeting_datetime_br.strftime("%d/%m/%Y")
                 time_str = meeting_datetime_br.strftime("%H:%M")
@@ -120,15 +138,25 @@ ATA DE REUNIÃO
 """
             
             client = self._get_client()
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.3
-            )
+            with track_stage("summary_api", **{
+                "openai.model": "gpt-4o-mini",
+                "transcription.chars": len(text),
+            }) as span:
+                response = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=1500,
+                    temperature=0.3
+                )
+                usage = getattr(response, "usage", None)
+                set_span_attributes(span, **{
+                    "openai.prompt_tokens": getattr(usage, "prompt_tokens", None),
+                    "openai.completion_tokens": getattr(usage, "completion_tokens", None),
+                })
+            record_token_usage("gpt-4o-mini", usage)
             
             summary = response.choices[0].message.content.strip()
             return summary
@@ -178,6 +206,7 @@ PALAVRAS-CHAVE: [palavra1, palavra2, palavra3, etc.]
                 max_tokens=400,
                 temperature=0.3
             )
+            record_token_usage("gpt-4o-mini", getattr(response, "usage", None))
             
             content = response.choices[0].message.content.strip()
             
@@ -1,25 +1,34 @@
 import os
 import tempfile
-from typing import Optional
-import openai
-from dotenv import load_dotenv
+from typing import Callable, Optional
 
-load_dotenv()
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..metrics import record_transcription, track_stage
+from ..tracing import set_span_attributes
 
 class TranscriberService:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
+    def __init__(self, api_key: Optional[str] = None, client_factory: Optional[Callable] = None):
+        api_key = api_key if api_key is not None else settings.openai_api_key
         if not api_key or api_key == "your_openai_api_key_here":
             raise ValueError("OPENAI_API_KEY environment variable is required and must be set to a valid OpenAI API key")
         
-        # Simple client initialization
+        # Client is created on first use (or shared through client_factory)
         self.api_key = api_key
         self.client = None
+        self._client_factory = client_factory
         print(f"TranscriberService initialized with API key ending in: ...{api_key[-4:]}")
     
     def _get_client(self):
-        """Get OpenAI client"""
-        return openai.OpenAI(api_key=self.api_key)
+        """Get OpenAI client (created once and reused)"""
+        if self.client is None:
+            if self._client_factory is not None:
+                self.client = self._client_factory()
+            else:
+                import openai
+                self.client = openai.OpenAI(api_key=self.api_key)
+        return self.client
     
     async def transcribe_audio(self, audio_file, filename: str) -> dict:
         """
@@ -34,23 +43,29 @@ class TranscriberService:
         """
         try:
             # Save uploaded file to temporary location
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as temp_file:
-                content = await audio_file.read()
-                temp_file.write(content)
-                temp_file_path = temp_file.name
+            with track_stage("temp_file_write"):
+                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as temp_file:
+                    content = await audio_file.read()
+                    temp_file.write(content)
+                    temp_file_path = temp_file.name
             
             # Transcribe using OpenAI Whisper
             client = self._get_client()
-            with open(temp_file_path, "rb") as audio:
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio,
-                    response_format="verbose_json"
-                )
+            with track_stage("whisper_api", **{
+                "openai.model": "whisper-1",
+                "audio.file_size": len(content),
+                # Whole file is sent in a single Whisper request
+                "audio.chunk_count": 1,
+            }) as span:
+                # The OpenAI client is blocking; keep the event loop free for other requests
+                transcript = await run_in_threadpool(self._create_transcription, client, temp_file_path)
+                set_span_attributes(span, **{"audio.duration": getattr(transcript, "duration", None)})
             
             # Clean up temporary file
             os.unlink(temp_file_path)
             
+            record_transcription("whisper-1", getattr(transcript, "duration", None))
+            
             return {
                 "text": transcript.text,
                 "language": transcript.language if hasattr(transcript, 'language') else None,
@@ -63,6 +78,16 @@ class TranscriberService:
                 os.unlink(temp_file_path)
             raise Exception(f"Erro na transcrição: {str(e)}")
     
+    @staticmethod
+    def _create_transcription(client, file_path: str):
+        """Blocking Whisper request for a file on disk"""
+        with open(file_path, "rb") as audio:
+            return client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio,
+                response_format="verbose_json"
+            )
+    
     async def transcribe_audio_local(self, audio_file, filename: str) -> dict:
         """
         Alternative method using faster-whisper for local transcription
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+
+from .config import settings
+
+# Exporter: "otlp", "console" or "none" (default - tracing disabled)
+TRACES_EXPORTER = settings.traces_exporter
+# Fraction of traces to sample (0.0 - 1.0)
+TRACES_SAMPLE_RATIO = settings.traces_sample_ratio
+SERVICE_NAME = settings.service_name
+
+# Set by setup_tracing(); stays None while tracing is disabled so start_span is a no-op
+_tracer = None
+
+
+def setup_tracing(app, engine):
+    """
+    Configure OpenTelemetry tracing for the FastAPI app and SQLAlchemy engine.
+
+    Outgoing OpenAI calls are traced through instrument_http_client(), which
+    the service container applies to the shared client's httpx transport.
+
+    Does nothing unless OTEL_TRACES_EXPORTER is set to "otlp" or "console".
+    """
+    global _tracer
+
+    if TRACES_EXPORTER in ("", "none"):
+        return
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        print("OpenTelemetry não está instalado. Tracing desativado.")
+        return
+
+    if TRACES_EXPORTER == "otlp":
+        # Endpoint is read from OTEL_EXPORTER_OTLP_ENDPOINT (default http://localhost:4318)
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    elif TRACES_EXPORTER == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        raise ValueError(f"OTEL_TRACES_EXPORTER inválido: {TRACES_EXPORTER} (use otlp, console ou none)")
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(TRACES_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health")
+    SQLAlchemyInstrumentor().instrument(engine=engine)
+
+    _tracer = trace.get_tracer("audio-transcriber")
+    print(f"OpenTelemetry tracing enabled (exporter={TRACES_EXPORTER}, sample_ratio={TRACES_SAMPLE_RATIO})")
+
+
+def instrument_http_client(client):
+    """
+    Trace requests made through a specific httpx client.
+
+    Patching httpx globally misses clients whose class was imported before
+    tracing was set up (the openai wrapper subclasses httpx.Client), so the
+    client is instrumented explicitly. No-op while tracing is disabled.
+    """
+    if _tracer is None:
+        return client
+
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    HTTPXClientInstrumentor.instrument_client(client)
+    return client
+
+
+@contextmanager
+def start_span(name: str, **attributes):
+    """
+    Start a span as a child of the current one.
+
+    Yields the span (or None when tracing is disabled). None-valued
+    attributes are skipped.
+    """
+    if _tracer is None:
+        yield None
+        return
+
+    with _tracer.start_as_current_span(name) as span:
+        set_span_attributes(span, **attributes)
+        yield span
+
+
+def set_span_attributes(span, **attributes):
+    """
+    Set attributes on a span returned by start_span (no-op for None)
+    """
+    if span is None:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(key, value)
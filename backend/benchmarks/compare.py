@@ -0,0 +1,76 @@
+"""
+Compare two benchmark result files produced by benchmarks/run.py.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Exits with status 1 if any latency metric regressed by more than the
+threshold (percent).
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(results: dict) -> dict:
+    """Flatten results into {metric name: value} for comparison"""
+    metrics = {}
+    startup = results.get("startup", {})
+    metrics["startup.startup_s"] = startup.get("startup_s")
+    metrics["startup.first_request_ms"] = startup.get("first_request_ms")
+    for upload in results.get("uploads", []):
+        prefix = f"upload.{upload['size_mb']:g}mb"
+        metrics[f"{prefix}.p50_ms"] = upload["latency"]["p50_ms"]
+        metrics[f"{prefix}.p99_ms"] = upload["latency"]["p99_ms"]
+        metrics[f"{prefix}.throughput_uploads_per_s"] = upload["throughput_uploads_per_s"]
+        metrics[f"{prefix}.peak_rss_delta_mb"] = upload["peak_rss_delta_mb"]
+    for reads in results.get("reads", []):
+        for name, value in reads.items():
+            if isinstance(value, dict):
+                metrics[f"reads.{reads['rows']}.{name}.p50_ms"] = value["p50_ms"]
+                metrics[f"reads.{reads['rows']}.{name}.p99_ms"] = value["p99_ms"]
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['metadata'].get('git_commit')}")
+    print(f"candidate: {candidate['metadata'].get('git_commit')}")
+    print()
+
+    base_metrics = flatten(baseline)
+    cand_metrics = flatten(candidate)
+    regressions = []
+
+    print(f"{'metric':<55} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for name in sorted(set(base_metrics) & set(cand_metrics)):
+        before, after = base_metrics[name], cand_metrics[name]
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<55} {before:>12.2f} {after:>12.2f} {change:>8.1f}%")
+
+        # Throughput is better when higher; everything else when lower
+        worse = -change if "throughput" in name else change
+        if worse > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed more than {args.threshold}%:")
+        for name in regressions:
+            print(f"  - {name}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
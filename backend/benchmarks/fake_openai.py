@@ -0,0 +1,98 @@
+"""
+Local fake of the OpenAI endpoints used by the backend.
+
+Implements just enough of /v1/audio/transcriptions and /v1/chat/completions
+for the benchmark suite, with configurable latency and 429 injection.
+
+Usage:
+    FAKE_OPENAI_LATENCY_MS=500 FAKE_OPENAI_429_RATE=0.1 \\
+        python -m uvicorn benchmarks.fake_openai:app --port 8100
+"""
+import asyncio
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Fixed latency added to every call, plus per-MB latency for transcriptions
+LATENCY_MS = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "200"))
+TRANSCRIPTION_MS_PER_MB = float(os.getenv("FAKE_OPENAI_TRANSCRIPTION_MS_PER_MB", "100"))
+# Fraction of requests answered with 429 Too Many Requests
+RATE_LIMIT_RATE = float(os.getenv("FAKE_OPENAI_429_RATE", "0"))
+# Used to derive a fake duration from the upload size (16 kHz mono 16-bit WAV)
+BYTES_PER_SECOND = 32000
+
+SAMPLE_TEXT = (
+    "Bom dia a todos. Hoje vamos revisar o andamento do projeto, os prazos da próxima "
+    "entrega e os responsáveis por cada tarefa. "
+)
+
+app = FastAPI(title="Fake OpenAI")
+stats = {"transcriptions": 0, "chat_completions": 0, "rate_limited": 0}
+
+
+def _rate_limited():
+    if RATE_LIMIT_RATE and random.random() < RATE_LIMIT_RATE:
+        stats["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after-ms": "50"},
+            content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+        )
+    return None
+
+
+@app.post("/v1/audio/transcriptions")
+async def transcriptions(request: Request):
+    limited = _rate_limited()
+    if limited:
+        return limited
+
+    form = await request.form()
+    upload = form["file"]
+    size = len(await upload.read())
+    await asyncio.sleep((LATENCY_MS + TRANSCRIPTION_MS_PER_MB * size / (1024 * 1024)) / 1000)
+
+    stats["transcriptions"] += 1
+    duration = size / BYTES_PER_SECOND
+    # Roughly 2.5 words per second of speech
+    words = max(1, int(duration * 2.5))
+    text = (SAMPLE_TEXT * (words // 20 + 1))[: words * 6]
+    return {"task": "transcribe", "language": "portuguese", "duration": duration, "text": text}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    limited = _rate_limited()
+    if limited:
+        return limited
+
+    body = await request.json()
+    await asyncio.sleep(LATENCY_MS / 1000)
+
+    stats["chat_completions"] += 1
+    prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+    content = "ATA DE REUNIÃO\n\n📋 Agenda:\n- Andamento do projeto\n- Prazos\n"
+    return {
+        "id": f"chatcmpl-fake-{stats['chat_completions']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_chars // 4 + len(content) // 4,
+        },
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
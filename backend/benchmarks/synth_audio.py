@@ -0,0 +1,66 @@
+"""
+Synthetic audio generation for benchmarks.
+
+Writes 16 kHz mono 16-bit PCM WAV files (a tone plus noise) of a given size.
+"""
+import math
+import os
+import random
+import struct
+import wave
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # bytes (16-bit)
+BYTES_PER_SECOND = SAMPLE_RATE * SAMPLE_WIDTH
+
+
+def generate_wav(path: str, size_mb: float, seed: int = 0) -> str:
+    """
+    Generate a WAV file of approximately size_mb megabytes
+
+    Args:
+        path: Output file path
+        size_mb: Target size in MB
+        seed: Random seed for the noise component
+
+    Returns:
+        str: The output path
+    """
+    rng = random.Random(seed)
+    total_frames = int(size_mb * 1024 * 1024 / SAMPLE_WIDTH)
+
+    # One second of audio, repeated to reach the target size
+    second = bytearray()
+    for i in range(SAMPLE_RATE):
+        value = 0.3 * math.sin(2 * math.pi * 440 * i / SAMPLE_RATE) + 0.05 * (rng.random() - 0.5)
+        second += struct.pack("<h", int(value * 32767))
+    second = bytes(second)
+
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SAMPLE_RATE)
+        remaining = total_frames
+        while remaining > 0:
+            frames = min(remaining, SAMPLE_RATE)
+            wav.writeframes(second[: frames * SAMPLE_WIDTH])
+            remaining -= frames
+
+    return path
+
+
+def generate_set(directory: str, sizes_mb) -> dict:
+    """
+    Generate one WAV per size, reusing files that already exist
+
+    Returns:
+        dict: size_mb -> file path
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    for size_mb in sizes_mb:
+        path = os.path.join(directory, f"synthetic_{size_mb:g}mb.wav")
+        if not os.path.exists(path):
+            generate_wav(path, size_mb)
+        files[size_mb] = path
+    return files
@@ -0,0 +1,35 @@
+# Gunicorn configuration for multi-worker deployments
+#
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# Each worker is a separate uvicorn process with its own services, DB pool
+# and job worker. Shared state (jobs, idempotency keys, cache versions)
+# lives in the database, so nodes can be added behind a load balancer.
+import multiprocessing
+import os
+import shutil
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Long uploads (transcription + summary) can take several minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = 30
+keepalive = 300
+
+accesslog = "-"
+
+
+def on_starting(server):
+    # Start with an empty Prometheus multiprocess directory
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,32 @@
+-- Idempotency keys for uploads (retries from the extension return the existing row)
+CREATE TABLE IF NOT EXISTS upload_claims (
+    key VARCHAR(255) PRIMARY KEY,
+    transcription_id INTEGER,
+    claimed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS ix_upload_claims_transcription_id ON upload_claims (transcription_id);
+
+-- Background jobs claimed with SELECT ... FOR UPDATE SKIP LOCKED
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    transcription_id INTEGER,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    locked_by VARCHAR(255),
+    locked_at TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    run_after TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS ix_jobs_transcription_id ON jobs (transcription_id);
+
+-- Cache versions shared by all workers
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(100) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
@@ -0,0 +1,2 @@
+-- Row version used in the transcription detail ETag (bumped on every change)
+ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
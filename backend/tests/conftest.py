@@ -0,0 +1,139 @@
+"""
+Shared fixtures: a throwaway SQLite database and a stub OpenAI client.
+
+The app reads its settings at import time, so the environment is set up
+here before anything under app/ is imported.
+"""
+import dataclasses
+import io
+import os
+import tempfile
+import wave
+from types import SimpleNamespace
+
+_DB_DIR = tempfile.mkdtemp(prefix="audio-transcriber-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["OPENAI_API_KEY"] = "sk-test-0000"
+os.environ["PRELOAD_SERVICES"] = "false"
+os.environ["OTEL_TRACES_EXPORTER"] = "none"
+os.environ["ASYNC_SUMMARIES"] = "false"
+# Tests run jobs explicitly instead of through the polling worker
+os.environ["JOB_WORKER_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import idempotency, jobs
+from app.cache import detail_cache, list_cache
+from app.config import settings
+from app.container import container
+from app.database import SessionLocal, create_tables, engine
+from app.main import app
+from app.models import Base
+from app.routes import audio
+
+TRANSCRIPT_TEXT = (
+    "Bom dia a todos. Hoje vamos revisar o andamento do projeto, "
+    "os prazos da próxima entrega e os responsáveis por cada item."
+)
+
+
+class StubOpenAI:
+    """
+    Stands in for openai.OpenAI. Records every call and how many pooled
+    database connections were checked out while it was in progress.
+    """
+
+    def __init__(self):
+        self.transcription_calls = 0
+        self.summary_calls = 0
+        self.fail_transcriptions = 0
+        self.fail_summaries = 0
+        self.connections_during_calls = []
+        # Called inside the Whisper request, e.g. to fire a concurrent retry
+        self.on_transcribe = None
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcribe))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+
+    def _transcribe(self, **kwargs):
+        self.transcription_calls += 1
+        self.connections_during_calls.append(engine.pool.checkedout())
+        if self.on_transcribe is not None:
+            self.on_transcribe()
+        if self.fail_transcriptions:
+            self.fail_transcriptions -= 1
+            raise RuntimeError("whisper unavailable")
+        return SimpleNamespace(text=TRANSCRIPT_TEXT, duration=1.0, language="portuguese")
+
+    def _complete(self, **kwargs):
+        self.summary_calls += 1
+        self.connections_during_calls.append(engine.pool.checkedout())
+        if self.fail_summaries:
+            self.fail_summaries -= 1
+            raise RuntimeError("429 Too Many Requests")
+        message = SimpleNamespace(content=f"ATA DE REUNIÃO #{self.summary_calls}")
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def database():
+    """Fresh tables (and empty response caches) for every test"""
+    Base.metadata.drop_all(bind=engine)
+    create_tables()
+    list_cache.invalidate()
+    detail_cache.invalidate()
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def openai_stub(monkeypatch):
+    stub = StubOpenAI()
+    monkeypatch.setattr(container, "_openai_client", stub)
+    monkeypatch.setattr(container, "_transcriber", None)
+    monkeypatch.setattr(container, "_summarizer", None)
+    return stub
+
+
+@pytest.fixture
+def client(openai_stub):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def override_settings(monkeypatch):
+    """Replace settings fields for the modules that read them at call time"""
+    def apply(**changes):
+        patched = dataclasses.replace(settings, **changes)
+        for module in (audio, idempotency, jobs):
+            monkeypatch.setattr(module, "settings", patched)
+        return patched
+    return apply
+
+
+def make_wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def upload(client, key=None, filename="reuniao.wav"):
+    headers = {"Idempotency-Key": key} if key else {}
+    files = {"file": (filename, make_wav(), "audio/wav")}
+    return client.post("/api/audio/upload", headers=headers, files=files)
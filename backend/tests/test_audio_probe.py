@@ -0,0 +1,237 @@
+import io
+import struct
+import wave
+
+import pytest
+
+from app.services.audio_probe import (
+    HEAD_BYTES,
+    TAIL_BYTES,
+    estimate_from_size,
+    format_from_hint,
+    probe_audio,
+)
+
+
+# --- Fixture builders --------------------------------------------------------
+
+def make_wav(seconds: float, rate: int = 16000, streaming: bool = False) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    data = bytearray(buffer.getvalue())
+    if streaming:
+        # Recorders that stream to disk never patch the data chunk size
+        data_chunk = data.find(b"data")
+        struct.pack_into("<I", data, data_chunk + 4, 0xFFFFFFFF)
+    return bytes(data)
+
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo, no padding: 417-byte frames
+MP3_FRAME_HEADER = b"\xff\xfb\x90\x00"
+MP3_FRAME_SIZE = 417
+
+
+def make_mp3(frames: int, id3_size: int = 0, id3v1: bool = False, xing_frames: int = None) -> bytes:
+    data = bytearray()
+    if id3_size:
+        syncsafe = bytes((id3_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+        data += b"ID3\x03\x00\x00" + syncsafe + b"\x00" * id3_size
+    for index in range(frames):
+        frame = bytearray(MP3_FRAME_HEADER + b"\x00" * (MP3_FRAME_SIZE - 4))
+        if index == 0 and xing_frames is not None:
+            # Xing header follows the 32-byte side info of a stereo MPEG-1 frame
+            struct.pack_into(">4sII", frame, 4 + 32, b"Xing", 0x1, xing_frames)
+        data += frame
+    if id3v1:
+        data += b"TAG" + b"\x00" * 125
+    return bytes(data)
+
+
+def ogg_page(granule: int, packet: bytes, header_type: int = 0, sequence: int = 0) -> bytes:
+    return (
+        b"OggS" + bytes([0, header_type]) + struct.pack("<qIII", granule, 1, sequence, 0)
+        + bytes([1, len(packet)]) + packet
+    )
+
+
+def make_opus(seconds: float, pre_skip: int = 312) -> bytes:
+    opus_head = b"OpusHead" + struct.pack("<BBHIhB", 1, 1, pre_skip, 48000, 0, 0)
+    pages = [ogg_page(0, opus_head, header_type=0x02)]
+    pages += [ogg_page(48000 * second, b"\x00" * 200, sequence=second) for second in range(1, int(seconds))]
+    pages.append(ogg_page(int(seconds * 48000) + pre_skip, b"\x00" * 200, header_type=0x04, sequence=int(seconds)))
+    return b"".join(pages)
+
+
+def mp4_box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def make_mp4(duration: int, timescale: int = 1000, version: int = 0, mdat_size: int = 0) -> bytes:
+    if version == 1:
+        mvhd = bytes([1, 0, 0, 0]) + struct.pack(">QQIQ", 0, 0, timescale, duration)
+    else:
+        mvhd = bytes([0, 0, 0, 0]) + struct.pack(">IIII", 0, 0, timescale, duration)
+    ftyp = mp4_box(b"ftyp", b"M4A \x00\x00\x02\x00isomM4A ")
+    moov = mp4_box(b"moov", mp4_box(b"mvhd", mvhd + b"\x00" * 80))
+    if mdat_size:
+        # Recorder layout: audio payload first, moov written at the end
+        return ftyp + mp4_box(b"mdat", b"\x00" * mdat_size) + moov
+    return ftyp + moov
+
+
+def ebml(element_id: int, payload: bytes, unknown_size: bool = False) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    if unknown_size:
+        return id_bytes + b"\x01\xff\xff\xff\xff\xff\xff\xff" + payload
+    return id_bytes + b"\x01" + len(payload).to_bytes(7, "big") + payload
+
+
+def webm_cluster(timecode: int, block_offsets, block_size: int = 100) -> bytes:
+    blocks = b"".join(
+        ebml(0xA3, b"\x81" + struct.pack(">hB", relative, 0x80) + b"\x00" * block_size)
+        for relative in block_offsets
+    )
+    return ebml(0x1F43B675, ebml(0xE7, timecode.to_bytes(2, "big")) + blocks, unknown_size=True)
+
+
+def make_webm(duration_ms: float = None, clusters=(), block_size: int = 100) -> bytes:
+    header = ebml(0x1A45DFA3, ebml(0x4282, b"webm"))
+    info = ebml(0x2AD7B1, (1000000).to_bytes(3, "big"))
+    if duration_ms is not None:
+        info += ebml(0x4489, struct.pack(">f", duration_ms))
+    body = ebml(0x1549A966, info)
+    body += b"".join(webm_cluster(timecode, offsets, block_size) for timecode, offsets in clusters)
+    return header + ebml(0x18538067, body, unknown_size=True)
+
+
+def probe(data: bytes, **hints):
+    return probe_audio(io.BytesIO(data), **hints)
+
+
+# --- Header parsers ----------------------------------------------------------
+
+def test_wav_duration_and_bitrate():
+    result = probe(make_wav(2.5))
+    assert result.format == "wav"
+    assert result.source == "header"
+    assert result.duration_seconds == pytest.approx(2.5)
+    assert result.bitrate_kbps == pytest.approx(256)
+
+
+def test_wav_with_unset_data_size_uses_file_size():
+    result = probe(make_wav(1.0, streaming=True))
+    assert result.source == "header"
+    assert result.duration_seconds == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("id3_size, id3v1", [(0, False), (1024, True), (HEAD_BYTES + 4096, False)])
+def test_mp3_cbr_duration_excludes_tags(id3_size, id3v1):
+    frames = 300
+    result = probe(make_mp3(frames, id3_size=id3_size, id3v1=id3v1))
+    assert result.format == "mp3"
+    assert result.source == "header"
+    assert result.bitrate_kbps == 128
+    assert result.duration_seconds == pytest.approx(frames * MP3_FRAME_SIZE * 8 / 128000)
+
+
+def test_mp3_xing_frame_count():
+    # Xing header reports many more frames than the file holds: it must win
+    result = probe(make_mp3(10, xing_frames=5000))
+    assert result.source == "header"
+    assert result.duration_seconds == pytest.approx(5000 * 1152 / 44100)
+
+
+def test_ogg_opus_last_granule_minus_pre_skip():
+    result = probe(make_opus(7))
+    assert result.format == "ogg"
+    assert result.source == "header"
+    assert result.duration_seconds == pytest.approx(7.0)
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_mp4_mvhd_duration(version):
+    result = probe(make_mp4(duration=93500, timescale=1000, version=version))
+    assert result.format == "mp4"
+    assert result.duration_seconds == pytest.approx(93.5)
+
+
+def test_mp4_moov_after_large_mdat():
+    result = probe(make_mp4(duration=44100 * 60, timescale=44100, mdat_size=3 * HEAD_BYTES))
+    assert result.source == "header"
+    assert result.duration_seconds == pytest.approx(60.0)
+
+
+def test_webm_duration_element():
+    result = probe(make_webm(duration_ms=12345.0, clusters=[(0, [0, 20])]))
+    assert result.format == "webm"
+    assert result.source == "header"
+    assert result.duration_seconds == pytest.approx(12.345)
+
+
+def test_webm_without_duration_uses_last_block_timecode():
+    # MediaRecorder output: no Duration, so the last cluster in the tail decides
+    clusters = [(timecode, [0, 500, 980]) for timecode in range(0, 10000, 1000)]
+    data = make_webm(clusters=clusters, block_size=2000)
+    assert len(data) < TAIL_BYTES
+    result = probe(data)
+    assert result.source == "header"
+    assert result.duration_seconds == pytest.approx(9.98)
+
+
+def test_webm_last_cluster_beyond_default_tail_window():
+    # Last cluster starts more than TAIL_BYTES before the end of the file
+    clusters = [(0, [0]), (4000, [0, 60])]
+    data = make_webm(clusters=clusters, block_size=TAIL_BYTES)
+    result = probe(data)
+    assert result.source == "header"
+    assert result.duration_seconds == pytest.approx(4.06)
+
+
+# --- Fallback to estimate ----------------------------------------------------
+
+@pytest.mark.parametrize("data, hints, expected_format", [
+    (b"not an audio file " * 1000, {"content_type": "audio/webm"}, "webm"),
+    (b"not an audio file " * 1000, {"filename": "recording.m4a"}, "mp4"),
+    (b"not an audio file " * 1000, {}, None),
+    (make_mp4(duration=1000)[:40], {}, "mp4"),
+    (make_webm(clusters=[]), {}, "webm"),
+    (b"", {"content_type": "audio/mpeg"}, "mp3"),
+])
+def test_unparseable_input_falls_back_to_estimate(data, hints, expected_format):
+    result = probe(data, **hints)
+    assert result.source == "estimate"
+    assert result.format == expected_format
+    assert result == estimate_from_size(len(data), expected_format)
+
+
+def test_probe_restores_file_position():
+    fileobj = io.BytesIO(make_wav(1.0))
+    fileobj.seek(10)
+    probe_audio(fileobj)
+    assert fileobj.tell() == 10
+
+
+# --- Hints and estimates -----------------------------------------------------
+
+@pytest.mark.parametrize("content_type, filename, expected", [
+    ("audio/webm;codecs=opus", None, "webm"),
+    ("AUDIO/MPEG", None, "mp3"),
+    ("application/octet-stream", "meeting.M4A", "mp4"),
+    (None, "notes.wav", "wav"),
+    (None, "notes.flac", None),
+    (None, None, None),
+])
+def test_format_from_hint(content_type, filename, expected):
+    assert format_from_hint(content_type, filename) == expected
+
+
+def test_estimate_from_size_uses_typical_bitrate():
+    one_minute_webm = 96 * 1000 // 8 * 60
+    result = estimate_from_size(one_minute_webm, "webm")
+    assert result.duration_seconds == pytest.approx(60.0)
+    assert result.bitrate_kbps == 96
+    assert estimate_from_size(16000, None).bitrate_kbps == 128
@@ -0,0 +1,174 @@
+from datetime import datetime
+
+from app.cache import ResponseCache
+from app.models import Transcription
+
+from .conftest import upload
+
+LIST_URL = "/api/audio/transcriptions"
+
+
+def detail_url(transcription_id: int) -> str:
+    return f"{LIST_URL}/{transcription_id}"
+
+
+# --- If-None-Match -----------------------------------------------------------
+
+def test_list_revalidates_with_304(client):
+    upload(client)
+    first = client.get(LIST_URL)
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = client.get(LIST_URL, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+
+    upload(client)
+    changed = client.get(LIST_URL, headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["total"] == 2
+
+
+def test_detail_revalidates_with_304(client):
+    transcription_id = upload(client).json()["id"]
+    etag = client.get(detail_url(transcription_id)).headers["etag"]
+    assert etag.startswith('W/"')
+
+    for header in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+        response = client.get(detail_url(transcription_id), headers={"If-None-Match": header})
+        assert response.status_code == 304, header
+    assert client.get(detail_url(transcription_id), headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_patch_changes_etag(client):
+    transcription_id = upload(client).json()["id"]
+    detail_etag = client.get(detail_url(transcription_id)).headers["etag"]
+    list_etag = client.get(LIST_URL).headers["etag"]
+
+    client.patch(detail_url(transcription_id), json={"filename": "renomeado.wav"})
+
+    detail = client.get(detail_url(transcription_id), headers={"If-None-Match": detail_etag})
+    assert detail.status_code == 200
+    assert detail.json()["filename"] == "renomeado.wav"
+    listing = client.get(LIST_URL, headers={"If-None-Match": list_etag})
+    assert listing.status_code == 200
+    assert listing.json()["transcriptions"][0]["filename"] == "renomeado.wav"
+
+
+def test_same_second_patches_change_etag(client, db):
+    transcription_id = upload(client).json()["id"]
+    pinned = datetime(2026, 1, 1, 12, 0, 0)
+    etags = []
+    for filename in ("a.wav", "b.wav"):
+        client.patch(detail_url(transcription_id), json={"filename": filename})
+        # Both writes land in the same second as far as updated_at can tell
+        db.query(Transcription).update({"updated_at": pinned}, synchronize_session=False)
+        db.commit()
+        response = client.get(detail_url(transcription_id))
+        assert response.json()["filename"] == filename
+        etags.append(response.headers["etag"])
+    assert etags[0] != etags[1]
+
+
+def test_regenerate_summary_changes_etag(client):
+    transcription_id = upload(client).json()["id"]
+    before = client.get(detail_url(transcription_id))
+
+    client.post(f"{detail_url(transcription_id)}/regenerate-summary")
+
+    after = client.get(detail_url(transcription_id), headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.json()["summary"] != before.json()["summary"]
+
+
+def test_delete_changes_list_etag(client):
+    transcription_id = upload(client).json()["id"]
+    list_etag = client.get(LIST_URL).headers["etag"]
+    client.get(detail_url(transcription_id))
+
+    client.delete(detail_url(transcription_id))
+
+    assert client.get(detail_url(transcription_id)).status_code == 404
+    listing = client.get(LIST_URL, headers={"If-None-Match": list_etag})
+    assert listing.status_code == 200
+    assert listing.json()["total"] == 0
+
+
+def test_writes_to_other_rows_keep_detail_etag(client):
+    first_id = upload(client).json()["id"]
+    second_id = upload(client).json()["id"]
+    etag = client.get(detail_url(first_id)).headers["etag"]
+
+    client.patch(detail_url(second_id), json={"filename": "outro.wav"})
+
+    assert client.get(detail_url(first_id), headers={"If-None-Match": etag}).status_code == 304
+
+
+# --- If-Modified-Since -------------------------------------------------------
+
+def test_if_modified_since(client):
+    transcription_id = upload(client).json()["id"]
+    last_modified = client.get(detail_url(transcription_id)).headers["last-modified"]
+
+    assert client.get(detail_url(transcription_id), headers={"If-Modified-Since": last_modified}).status_code == 304
+    older = "Mon, 01 Jan 2001 00:00:00 GMT"
+    assert client.get(detail_url(transcription_id), headers={"If-Modified-Since": older}).status_code == 200
+    assert client.get(detail_url(transcription_id), headers={"If-Modified-Since": "not a date"}).status_code == 200
+
+
+def test_if_none_match_takes_precedence(client):
+    transcription_id = upload(client).json()["id"]
+    last_modified = client.get(detail_url(transcription_id)).headers["last-modified"]
+    response = client.get(detail_url(transcription_id), headers={
+        "If-None-Match": '"stale"',
+        "If-Modified-Since": last_modified,
+    })
+    assert response.status_code == 200
+
+
+# --- Response cache ----------------------------------------------------------
+
+def test_detail_served_from_cache_until_the_row_changes(client, db):
+    transcription_id = upload(client).json()["id"]
+    client.get(detail_url(transcription_id))
+
+    # Changed behind the API's back (no version bump): the cached body is served
+    db.query(Transcription).update({"filename": "direto.wav"}, synchronize_session=False)
+    db.commit()
+    assert client.get(detail_url(transcription_id)).json()["filename"] == "reuniao.wav"
+
+    client.patch(detail_url(transcription_id), json={"tags": ["cliente"]})
+    assert client.get(detail_url(transcription_id)).json()["filename"] == "direto.wav"
+
+
+def test_response_cache_misses_on_a_different_etag():
+    cache = ResponseCache("test", max_entries=2)
+    cache.set("a", 'W/"1"', b"one")
+    assert cache.get("a", 'W/"1"') == b"one"
+    assert cache.get("a", 'W/"2"') is None
+    assert cache.get("missing", 'W/"1"') is None
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache("test", max_entries=2)
+    cache.set("a", "e", b"a")
+    cache.set("b", "e", b"b")
+    # Touch "a" so "b" becomes the oldest entry
+    cache.get("a", "e")
+    cache.set("c", "e", b"c")
+
+    assert cache.get("b", "e") is None
+    assert cache.get("a", "e") == b"a"
+    assert cache.get("c", "e") == b"c"
+
+
+def test_response_cache_invalidate():
+    cache = ResponseCache("test", max_entries=4)
+    cache.set("a", "e", b"a")
+    cache.set("b", "e", b"b")
+    cache.invalidate("a")
+    assert cache.get("a", "e") is None
+    assert cache.get("b", "e") == b"b"
+    cache.invalidate()
+    assert cache.get("b", "e") is None
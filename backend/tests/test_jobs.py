@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.jobs import JOB_SUMMARIZE, JobWorker, claim_job, enqueue_job, finish_job
+from app.models import Job, Transcription
+
+from .conftest import TRANSCRIPT_TEXT, upload
+
+
+def run_worker_once() -> bool:
+    return asyncio.run(JobWorker(poll_interval=0).run_once())
+
+
+def utcnow():
+    # SQLite hands DateTime(timezone=True) values back as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest.fixture
+def async_upload(client, override_settings):
+    override_settings(async_summaries=True, job_retry_backoff_seconds=30, job_max_attempts=3)
+    return upload(client).json()
+
+
+def test_worker_writes_the_summary(async_upload, client, openai_stub, db):
+    assert async_upload["summary_status"] == "pending"
+    assert run_worker_once() is True
+
+    job = db.query(Job).one()
+    assert job.status == "done"
+    assert job.run_after is None
+    detail = client.get(f"/api/audio/transcriptions/{async_upload['id']}").json()
+    assert detail["summary"].startswith("ATA DE REUNIÃO")
+    # Read transaction is closed before the OpenAI call
+    assert openai_stub.connections_during_calls[-1] == 0
+    assert run_worker_once() is False
+
+
+def test_failed_job_waits_out_its_backoff(async_upload, openai_stub, db):
+    openai_stub.fail_summaries = 1
+    assert run_worker_once() is True
+
+    job = db.query(Job).one()
+    assert job.status == "pending"
+    assert job.attempts == 1
+    assert "429" in job.last_error
+    assert job.run_after == pytest.approx(utcnow() + timedelta(seconds=30), abs=timedelta(seconds=5))
+
+    # Not claimable until run_after
+    assert run_worker_once() is False
+    assert openai_stub.summary_calls == 1
+
+    db.query(Job).update({"run_after": utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert run_worker_once() is True
+    db.expire_all()
+    assert db.query(Job).one().status == "done"
+
+
+def test_backoff_doubles_until_max_attempts(db, override_settings):
+    override_settings(job_retry_backoff_seconds=10, job_max_attempts=3)
+    enqueue_job(db, JOB_SUMMARIZE, 1)
+    db.commit()
+
+    delays = []
+    for _ in range(3):
+        db.query(Job).update({"run_after": None})
+        db.commit()
+        job = claim_job(db)
+        finish_job(db, job, error="429")
+        delays.append((job.run_after - utcnow()).total_seconds())
+
+    assert delays[0] == pytest.approx(10, abs=2)
+    assert delays[1] == pytest.approx(20, abs=2)
+    assert job.status == "failed"
+
+
+def test_stale_running_job_is_reclaimed(db, override_settings):
+    override_settings(job_lock_timeout_seconds=60)
+    db.add(Job(kind=JOB_SUMMARIZE, transcription_id=1, status="running", attempts=1,
+               locked_by="dead:1", locked_at=utcnow() - timedelta(minutes=5)))
+    db.add(Job(kind=JOB_SUMMARIZE, transcription_id=2, status="running", attempts=1,
+               locked_by="alive:2", locked_at=utcnow()))
+    db.commit()
+
+    job = claim_job(db)
+    assert job.transcription_id == 1
+    assert job.attempts == 2
+    assert claim_job(db) is None
+
+
+def test_job_for_deleted_transcription_is_a_no_op(client, openai_stub, db):
+    db.add(Transcription(filename="a.wav", original_text=TRANSCRIPT_TEXT, summary=""))
+    db.commit()
+    enqueue_job(db, JOB_SUMMARIZE, 999)
+    db.commit()
+
+    assert run_worker_once() is True
+    assert db.query(Job).one().status == "done"
+    assert openai_stub.summary_calls == 0
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta, timezone
+
+from app.idempotency import attach_claim, claim_upload, release_claim
+from app.models import Job, Transcription, UploadClaim
+
+from .conftest import TRANSCRIPT_TEXT, upload
+
+
+def long_ago():
+    return datetime.now(timezone.utc) - timedelta(hours=2)
+
+
+# --- Upload pipeline ---------------------------------------------------------
+
+def test_sync_upload_returns_summary(client, openai_stub):
+    response = upload(client)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["text"] == TRANSCRIPT_TEXT
+    assert body["summary"].startswith("ATA DE REUNIÃO")
+    assert body["summary_status"] == "done"
+
+
+def test_no_connection_held_during_openai_calls(client, openai_stub):
+    upload(client, key="rec-1")
+    transcription_id = client.get("/api/audio/transcriptions").json()["transcriptions"][0]["id"]
+    client.post(f"/api/audio/transcriptions/{transcription_id}/regenerate-summary")
+    assert openai_stub.transcription_calls == 1
+    assert openai_stub.summary_calls == 2
+    assert openai_stub.connections_during_calls == [0, 0, 0]
+
+
+# --- Idempotency-Key ---------------------------------------------------------
+
+def test_replay_returns_original_without_calling_openai(client, openai_stub):
+    first = upload(client, key="rec-1")
+    second = upload(client, key="rec-1")
+    assert second.status_code == 200
+    assert second.json()["id"] == first.json()["id"]
+    assert openai_stub.transcription_calls == 1
+    assert client.get("/api/audio/transcriptions").json()["total"] == 1
+
+
+def test_retry_while_in_flight_gets_409(client, openai_stub):
+    retries = []
+    # The retry arrives while the first request is waiting on Whisper
+    openai_stub.on_transcribe = lambda: retries.append(upload(client, key="rec-1"))
+    first = upload(client, key="rec-1")
+    openai_stub.on_transcribe = None
+    assert first.status_code == 200
+    assert retries[0].status_code == 409
+    assert openai_stub.transcription_calls == 1
+
+
+def test_failed_transcription_releases_the_key(client, openai_stub, db):
+    openai_stub.fail_transcriptions = 1
+    assert upload(client, key="rec-1").status_code == 500
+    assert db.query(UploadClaim).count() == 0
+
+    retry = upload(client, key="rec-1")
+    assert retry.status_code == 200
+    assert openai_stub.transcription_calls == 2
+
+
+def test_stale_claim_is_taken_over(client, openai_stub, db):
+    db.add(UploadClaim(key="rec-1", claimed_at=long_ago()))
+    db.commit()
+    response = upload(client, key="rec-1")
+    assert response.status_code == 200
+    assert openai_stub.transcription_calls == 1
+
+
+def test_stale_claim_with_saved_row_is_replayed(client, openai_stub, db):
+    transcription = Transcription(filename="a.wav", original_text=TRANSCRIPT_TEXT, summary="ATA")
+    db.add(transcription)
+    db.flush()
+    db.add(UploadClaim(key="rec-1", transcription_id=transcription.id, claimed_at=long_ago()))
+    db.commit()
+
+    response = upload(client, key="rec-1")
+    assert response.status_code == 200
+    assert response.json()["id"] == transcription.id
+    assert openai_stub.transcription_calls == 0
+
+
+def test_replay_regenerates_a_failed_sync_summary(client, openai_stub):
+    openai_stub.fail_summaries = 1
+    assert upload(client, key="rec-1").status_code == 500
+
+    retry = upload(client, key="rec-1")
+    assert retry.status_code == 200
+    assert retry.json()["summary_status"] == "done"
+    assert openai_stub.transcription_calls == 1
+    assert openai_stub.summary_calls == 2
+
+
+def test_replay_requeues_a_failed_async_summary(client, openai_stub, override_settings, db):
+    override_settings(async_summaries=True)
+    first = upload(client, key="rec-1")
+    assert first.json()["summary_status"] == "pending"
+    assert openai_stub.summary_calls == 0
+
+    # Pending job already queued: a replay doesn't add another
+    upload(client, key="rec-1")
+    assert db.query(Job).count() == 1
+
+    db.query(Job).update({"status": "failed"})
+    db.commit()
+    upload(client, key="rec-1")
+    assert db.query(Job).filter(Job.status == "pending").count() == 1
+
+
+def test_deleting_a_transcription_frees_its_key(client, openai_stub):
+    first = upload(client, key="rec-1").json()
+    client.delete(f"/api/audio/transcriptions/{first['id']}")
+    second = upload(client, key="rec-1")
+    assert second.status_code == 200
+    # Processed again rather than replayed
+    assert openai_stub.transcription_calls == 2
+
+
+# --- Claim state machine -----------------------------------------------------
+
+def test_claim_states(db):
+    assert claim_upload(db, "rec-1") == (True, None)
+    # In flight
+    assert claim_upload(db, "rec-1") == (False, None)
+
+    transcription = Transcription(filename="a.wav", original_text=TRANSCRIPT_TEXT, summary="")
+    db.add(transcription)
+    db.flush()
+    attach_claim(db, "rec-1", transcription.id)
+    db.commit()
+    # Saved but the owner is still summarizing
+    assert claim_upload(db, "rec-1") == (False, None)
+
+    release_claim(db, "rec-1")
+    assert claim_upload(db, "rec-1") == (False, transcription.id)
+
+
+def test_attach_refreshes_claimed_at(db, override_settings):
+    override_settings(upload_claim_timeout_seconds=60)
+    assert claim_upload(db, "rec-1") == (True, None)
+    # Whisper took longer than the claim timeout
+    db.query(UploadClaim).update({"claimed_at": long_ago()})
+    db.commit()
+
+    transcription = Transcription(filename="a.wav", original_text=TRANSCRIPT_TEXT, summary="")
+    db.add(transcription)
+    db.flush()
+    attach_claim(db, "rec-1", transcription.id)
+    db.commit()
+    assert claim_upload(db, "rec-1") == (False, None)
+
+
+def test_release_without_saved_row_deletes_the_claim(db):
+    claim_upload(db, "rec-1")
+    release_claim(db, "rec-1")
+    assert db.query(UploadClaim).count() == 0
+    assert claim_upload(db, "rec-1") == (True, None)
@@ -252,6 +252,8 @@ class AudioRecorder {
             
             // Store blob
             this.recordedBlob = blob;
+            // Same key on every retry so the backend doesn't create duplicates
+            this.idempotencyKey = `recording-${storage.lastRecording.timestamp}-${storage.lastRecording.size}`;
             console.log('✅ Blob stored in this.recordedBlob');
             
             // Show preview and actions
@@ -281,7 +283,7 @@ class AudioRecorder {
         try {
             console.log('💰 Fetching cost estimate for', sizeMB, 'MB');
             
-            const response = await fetch(`${this.API_BASE_URL}/audio/estimate-cost?file_size_mb=${sizeMB}`);
+            const response = await fetch(`${this.API_BASE_URL}/audio/estimate-cost?file_size_mb=${sizeMB}&content_type=audio/webm`);
             
             if (!response.ok) {
                 console.warn('Could not fetch cost estimate');
@@ -359,6 +361,7 @@ class AudioRecorder {
             console.log('Making fetch request to:', `${this.API_BASE_URL}/audio/upload`);
             const response = await fetch(`${this.API_BASE_URL}/audio/upload`, {
                 method: 'POST',
+                headers: this.idempotencyKey ? { 'Idempotency-Key': this.idempotencyKey } : {},
                 body: formData
             });
 
@@ -453,6 +456,7 @@ class AudioRecorder {
     clearRecording() {
         // Reset all recording data
         this.recordedBlob = null;
+        this.idempotencyKey = null;
         
         // Hide UI elements
         this.audioPreview.classList.add('hidden');